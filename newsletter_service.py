@@ -12,28 +12,51 @@ Fixed issues:
 """
 
 import asyncio
+import atexit
+import csv
+import hmac
+import io
 import os
-import json
 import sqlite3
-import smtplib
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, List, Any
+from typing import Optional, Dict, List, Any, Tuple, Iterable, Iterator, Mapping
 from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import logging
-from dataclasses import dataclass, asdict
-import uuid
-import re
+from dataclasses import dataclass, asdict, field
+import queue
+import secrets
+import string
 import threading
-from contextlib import contextmanager
+import time
+from types import MappingProxyType
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
 
 from fastapi import FastAPI, HTTPException, Request, Depends, Query
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel, EmailStr, Field, validator
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, EmailStr, Field, ValidationError, validator
+import aiosmtplib
+import orjson
 import uvicorn
 
+# Launch moment as a UNIX timestamp, for the countdown
+LAUNCH_TS = datetime(2025, 9, 1, tzinfo=timezone.utc).timestamp()
+
+# Seconds an analytics result may be served from cache
+ANALYTICS_CACHE_TTL = 30
+# Public /stats tolerates staler numbers in exchange for fewer queries
+STATS_CACHE_TTL = 60
+# Rows pulled from SQLite per fetch while streaming exports
+EXPORT_FETCH_SIZE = 1000
+# Seconds to wait for a pooled read connection before giving up
+READ_POOL_TIMEOUT = 10.0
+# Concurrent streamed exports, each on its own read connection
+EXPORT_STREAM_LIMIT = 4
+
 class AnalyticsEvent(BaseModel):
     event: str
     data: Dict[str, Any] = {}
@@ -41,9 +64,9 @@ class AnalyticsEvent(BaseModel):
     page: str
 
 # Configuration
-@dataclass
+@dataclass(frozen=True, slots=True)
 class NewsletterConfig:
-    """Newsletter service configuration."""
+    """Newsletter service configuration (immutable once created)."""
     
     # Database
     database_path: str = "newsletter.db"
@@ -65,18 +88,14 @@ class NewsletterConfig:
     
     # Security
     admin_token: str = os.getenv("ADMIN_TOKEN", "musequill-admin-2025")
-    cors_origins: List[str] = None
-    
-    def __post_init__(self):
-        if self.cors_origins is None:
-            self.cors_origins = [
-                "https://musequill.ink",
-                "https://www.musequill.ink",
-                "http://localhost:3000",
-                "http://localhost:8000",
-                "http://127.0.0.1:3000",
-                "http://127.0.0.1:8000"
-            ]
+    cors_origins: List[str] = field(default_factory=lambda: [
+        "https://musequill.ink",
+        "https://www.musequill.ink",
+        "http://localhost:3000",
+        "http://localhost:8000",
+        "http://127.0.0.1:3000",
+        "http://127.0.0.1:8000"
+    ])
 
 
 # Pydantic Models
@@ -94,6 +113,14 @@ class NewsletterSignup(BaseModel):
     utm_campaign: Optional[str] = None
     utm_content: Optional[str] = None
 
+# Signup routes parse their body manually, so document it explicitly
+SIGNUP_OPENAPI = {
+    "requestBody": {
+        "content": {"application/json": {"schema": NewsletterSignup.model_json_schema()}},
+        "required": True
+    }
+}
+
 class NewsletterResponse(BaseModel):
     success: bool
     message: str
@@ -109,30 +136,215 @@ class AnalyticsResponse(BaseModel):
     launch_countdown: Dict[str, Any]
 
 
+@lru_cache(maxsize=1)
+def launch_countdown(now: int) -> Mapping[str, int]:
+    """Countdown to launch as of the UNIX second ``now``.
+    
+    Every request within the same second shares one result, so it is
+    returned as a read-only mapping.
+    """
+    remaining = max(0, int(LAUNCH_TS) - now)
+    days, remainder = divmod(remaining, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    
+    return MappingProxyType({
+        "days": days,
+        "hours": hours,
+        "minutes": minutes,
+        "seconds": seconds,
+        "total_seconds": remaining
+    })
+
+
+def new_ids(count: int) -> List[str]:
+    """Generate ``count`` random 128-bit hex ids from a single entropy read."""
+    raw = secrets.token_hex(16 * count)
+    return [raw[i:i + 32] for i in range(0, 32 * count, 32)]
+
+
+# SQL statements used on hot paths. Keeping the text identical between calls
+# lets each connection reuse its prepared statement instead of re-parsing it.
+STATEMENT_CACHE_SIZE = 256
+
+# Returns no row when the email already exists, instead of raising
+_INSERT_SUBSCRIBER_SQL = """
+    INSERT INTO subscribers (
+        id, email, name, source, campaign, interests, referrer,
+        user_agent, ip_address, utm_source, utm_medium, utm_campaign,
+        utm_content, confirmation_token, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(email) DO NOTHING
+    RETURNING id
+"""
+
+# Takes the batch's emails as one JSON array, so the statement text (and its
+# cached prepared statement) is the same for any batch size
+_SELECT_SUBSCRIBERS_SQL = """
+    SELECT email, id, unsubscribed_at FROM subscribers
+    WHERE email IN (SELECT value FROM json_each(?))
+"""
+
+_RESUBSCRIBE_SQL = """
+    UPDATE subscribers SET 
+        is_active = 1, 
+        unsubscribed_at = NULL, 
+        updated_at = ?,
+        source = ?,
+        campaign = ?
+    WHERE email = ?
+"""
+
+_INSERT_EVENT_SQL = """
+    INSERT INTO events (id, subscriber_id, event_type, event_data, created_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_COUNT_QUERIES_SQL = """
+    SELECT COUNT(*),
+           COALESCE(SUM(is_active = 1), 0),
+           COALESCE(SUM(is_confirmed = 1), 0)
+    FROM subscribers
+"""
+
+# Maintained by the subscriber_daily_rollup trigger
+_DAILY_SIGNUPS_SQL = "SELECT date, count FROM signup_daily WHERE date >= ? ORDER BY date DESC"
+
+# The ``kind`` column says which breakdown a row belongs to
+_BREAKDOWNS_SQL = """
+    WITH recent AS MATERIALIZED (
+        SELECT source, campaign
+        FROM subscribers
+        WHERE created_at >= ?
+    )
+    SELECT 'source' AS kind, source AS key, COUNT(*) AS count
+    FROM recent GROUP BY source
+    UNION ALL
+    SELECT 'campaign', campaign, COUNT(*) FROM recent GROUP BY campaign
+"""
+
+_EXPORT_SQL = "SELECT * FROM subscribers WHERE is_active = 1 ORDER BY created_at DESC"
+
+_EXPORT_CAMPAIGN_SQL = """
+    SELECT * FROM subscribers
+    WHERE is_active = 1 AND campaign = ?
+    ORDER BY created_at DESC
+"""
+
+
 # Database Manager with proper concurrency handling
 class NewsletterDatabase:
-    """SQLite database manager for newsletter service with thread safety."""
+    """SQLite database manager for newsletter service with thread safety.
+
+    WAL mode allows one writer alongside any number of readers, so the
+    manager keeps a single read-write connection guarded by a lock plus a
+    bounded pool of read-only connections that are opened once and reused.
+    """
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, read_pool_size: Optional[int] = None):
         self.db_path = db_path
-        self._lock = threading.RLock()
+        self._all_conns: List[sqlite3.Connection] = []
+        self._write_lock = threading.Lock()
+        self._write_conn = self._connect()
         self.init_database()
+        
+        # Analytics results keyed by ``days``: (timestamp, version, result)
+        self._analytics_cache: Dict[int, Tuple[float, int, Dict[str, Any]]] = {}
+        self._analytics_cache_version = 0
+        self._analytics_cache_lock = threading.Lock()
+        
+        # Read-only connections require the database file to exist, so the
+        # pool is filled only after the schema has been created.
+        pool_size = read_pool_size or min(os.cpu_count() or 1, 8)
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._read_pool.put(self._connect(read_only=True))
+        self._export_slots = threading.BoundedSemaphore(EXPORT_STREAM_LIMIT)
+        
+        # Connections live for the whole process; close them on interpreter exit
+        atexit.register(self.close)
     
-    @contextmanager
-    def get_connection(self):
-        """Get a database connection with proper locking."""
-        with self._lock:
-            conn = sqlite3.connect(self.db_path, timeout=30.0)
+    def _connect(self, read_only: bool = False, track: bool = True) -> sqlite3.Connection:
+        """Open a connection and apply per-connection settings once.
+
+        PRAGMAs are set here, when the physical connection is created, rather
+        than every time a connection is handed out. Untracked connections are
+        not closed by close(); the caller owns them.
+        """
+        if read_only:
+            conn = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                timeout=30.0,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+            conn.row_factory = sqlite3.Row
+        else:
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=30.0,
+                isolation_level=None,  # Transactions are managed explicitly
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
             conn.execute("PRAGMA journal_mode=WAL")  # Enable WAL mode for better concurrency
-            conn.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
+            conn.execute("PRAGMA synchronous=NORMAL")  # Crash-safe under WAL, fewer fsyncs
+            conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA busy_timeout=30000")  # 30 second timeout
+        conn.execute("PRAGMA cache_size=-64000")  # 64 MB page cache
+        conn.execute("PRAGMA temp_store=MEMORY")  # Keep GROUP BY/ORDER BY temp tables in RAM
+        conn.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+        conn.execute("PRAGMA foreign_keys=ON")
+        if track:
+            self._all_conns.append(conn)
+        return conn
+    
+    def close(self):
+        """Close every connection opened by this manager."""
+        while self._all_conns:
+            self._all_conns.pop().close()
+    
+    @contextmanager
+    def get_read_conn(self):
+        """Borrow a read-only connection from the pool.
+        
+        Raises sqlite3.OperationalError if none frees up within
+        READ_POOL_TIMEOUT seconds.
+        """
+        try:
+            conn = self._read_pool.get(timeout=READ_POOL_TIMEOUT)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a read connection")
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+    
+    @contextmanager
+    def get_write_conn(self):
+        """Get the writer connection inside an immediate transaction.
+        
+        BEGIN IMMEDIATE takes the write lock upfront so a transaction never
+        has to upgrade from a read lock, which is what causes SQLITE_BUSY
+        deadlocks under concurrent signups.
+        """
+        with self._write_lock:
+            conn = self._write_conn
+            conn.execute("BEGIN IMMEDIATE")
             try:
                 yield conn
-            finally:
-                conn.close()
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            else:
+                if conn.in_transaction:
+                    conn.execute("COMMIT")
     
     def init_database(self):
         """Initialize database with required tables."""
-        with self.get_connection() as conn:
+        with self.get_write_conn() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS subscribers (
                     id TEXT PRIMARY KEY,
@@ -183,11 +395,57 @@ class NewsletterDatabase:
                 )
             """)
             
+            # Daily signup counts, kept current by a trigger so analytics
+            # reads one row per day instead of grouping every subscriber
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS signup_daily (
+                    date TEXT PRIMARY KEY, -- YYYY-MM-DD
+                    count INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS subscriber_daily_rollup
+                AFTER INSERT ON subscribers
+                BEGIN
+                    INSERT INTO signup_daily (date, count)
+                    VALUES (substr(NEW.created_at, 1, 10), 1)
+                    ON CONFLICT(date) DO UPDATE SET count = count + 1;
+                END
+            """)
+            
+            # Backfill the rollup for databases created before it existed
+            if conn.execute("SELECT 1 FROM signup_daily LIMIT 1").fetchone() is None:
+                conn.execute("""
+                    INSERT INTO signup_daily (date, count)
+                    SELECT substr(created_at, 1, 10), COUNT(*)
+                    FROM subscribers
+                    GROUP BY substr(created_at, 1, 10)
+                """)
+            
             # Create indexes
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_email ON subscribers(email)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_campaign ON subscribers(campaign)")
-            conn.execute("CREATE INDEX IF NOT EXISTS idx_source ON subscribers(source)")
+            # Statistics are gathered in full only when the newest index is
+            # first created; later starts just let PRAGMA optimize top them up
+            new_indexes = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_campaign_created'"
+            ).fetchone() is None
+            # email's UNIQUE constraint already backs lookups and ON CONFLICT
+            # with a unique index; a second, non-unique one only slows writes
+            conn.execute("DROP INDEX IF EXISTS idx_email")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_created_at ON subscribers(created_at)")
+            # Covers the analytics range scan so it never touches table rows
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_created_source_campaign
+                ON subscribers(created_at, source, campaign)
+            """)
+            # Campaign exports filter on campaign and order by created_at
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_campaign_created
+                ON subscribers(campaign, created_at)
+            """)
+            # Superseded by idx_campaign_created and idx_created_source_campaign
+            conn.execute("DROP INDEX IF EXISTS idx_campaign")
+            conn.execute("DROP INDEX IF EXISTS idx_source")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_events_type ON events(event_type)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at)")
             
@@ -205,28 +463,66 @@ class NewsletterDatabase:
                 now
             ))
             
-            conn.commit()
+            # Refresh planner statistics so the new indexes get picked
+            if new_indexes:
+                conn.execute("ANALYZE")
+            else:
+                conn.execute("PRAGMA optimize")
     
     def add_subscriber(self, signup: NewsletterSignup, ip_address: str = None) -> str:
-        """Add a new subscriber to the database."""
-        subscriber_id = str(uuid.uuid4())
+        """Add a new subscriber to the database.
+        
+        Raises ValueError if the email is already subscribed.
+        """
+        subscriber_id = self.add_subscribers([(signup, ip_address)])[0]
+        if subscriber_id is None:
+            raise ValueError("Email already subscribed")
+        return subscriber_id
+    
+    def add_subscribers(self, signups: List[Tuple[NewsletterSignup, Optional[str]]]) -> List[Optional[str]]:
+        """Add a batch of ``(signup, ip_address)`` pairs in one transaction.
+        
+        Existing emails are looked up with a single query inside the same
+        immediate transaction as the writes, so the rows seen cannot change
+        before they are acted on. Only the first occurrence of an email within
+        the batch is written. All subscriber and event rows commit together.
+        
+        Returns one subscriber id per signup, in order, or None where the
+        email is already subscribed.
+        """
+        results: List[Optional[str]] = [None] * len(signups)
+        
+        # Repeats of an email within the batch count as already subscribed
+        first: Dict[str, int] = {}
+        for i, (signup, _) in enumerate(signups):
+            first.setdefault(signup.email, i)
+        if not first:
+            return results
+        
+        # Build everything up front to keep the write-locked section short
+        emails = orjson.dumps(list(first)).decode()
+        ids = new_ids(3 * len(first))
         now = datetime.now(timezone.utc).isoformat()
         
-        with self.get_connection() as conn:
-            try:
-                conn.execute("""
-                    INSERT INTO subscribers (
-                        id, email, name, source, campaign, interests, referrer,
-                        user_agent, ip_address, utm_source, utm_medium, utm_campaign,
-                        utm_content, confirmation_token, created_at, updated_at
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+        with self.get_write_conn() as conn:
+            existing = {row[0]: row for row in conn.execute(_SELECT_SUBSCRIBERS_SQL, (emails,))}
+            
+            for n, i in enumerate(first.values()):
+                signup, ip_address = signups[i]
+                subscriber_id, confirmation_token, event_id = ids[3 * n:3 * n + 3]
+                row = existing.get(signup.email)
+                if row:
+                    if row[2]:  # Was unsubscribed
+                        results[i] = self._resubscribe(conn, row[1], signup, event_id, now)
+                    continue
+                
+                inserted = conn.execute(_INSERT_SUBSCRIBER_SQL, (
                     subscriber_id,
                     signup.email,
                     signup.name,
                     signup.source,
                     signup.campaign,
-                    json.dumps(signup.interests or []),
+                    orjson.dumps(signup.interests or []).decode(),
                     signup.referrer,
                     signup.user_agent,
                     ip_address,
@@ -234,249 +530,661 @@ class NewsletterDatabase:
                     signup.utm_medium,
                     signup.utm_campaign,
                     signup.utm_content,
-                    str(uuid.uuid4()),  # confirmation token
+                    confirmation_token,
                     now,
                     now
-                ))
-                
-                # Log signup event
-                self.log_event(conn, subscriber_id, "signup", {
-                    "source": signup.source,
-                    "campaign": signup.campaign,
-                    "ip": ip_address
-                })
-                
-                conn.commit()
-                return subscriber_id
+                )).fetchall()
                 
-            except sqlite3.IntegrityError:
-                # Email already exists - update if unsubscribed
-                cursor = conn.execute(
-                    "SELECT id, is_active, unsubscribed_at FROM subscribers WHERE email = ?",
-                    (signup.email,)
-                )
-                result = cursor.fetchone()
-                
-                if result and result[2]:  # Was unsubscribed
-                    conn.execute("""
-                        UPDATE subscribers SET 
-                            is_active = 1, 
-                            unsubscribed_at = NULL, 
-                            updated_at = ?,
-                            source = ?,
-                            campaign = ?
-                        WHERE email = ?
-                    """, (now, signup.source, signup.campaign, signup.email))
-                    
-                    self.log_event(conn, result[0], "resubscribe", {
+                if inserted:
+                    # Log signup event
+                    self.log_event(conn, subscriber_id, "signup", {
                         "source": signup.source,
-                        "campaign": signup.campaign
-                    })
-                    
-                    conn.commit()
-                    return result[0]
-                
-                raise ValueError("Email already subscribed")
+                        "campaign": signup.campaign,
+                        "ip": ip_address
+                    }, event_id=event_id, created_at=now)
+                    results[i] = subscriber_id
+        
+        # Invalidate only after the write has committed so a concurrent reader
+        # cannot cache pre-write data under the new version.
+        self._invalidate_analytics_cache()
+        return results
+    
+    def _resubscribe(self, conn, subscriber_id: str, signup: NewsletterSignup,
+                     event_id: str, now: str) -> str:
+        """Reactivate an unsubscribed subscriber and log the event."""
+        conn.execute(
+            _RESUBSCRIBE_SQL,
+            (now, signup.source, signup.campaign, signup.email)
+        )
+        
+        self.log_event(conn, subscriber_id, "resubscribe", {
+            "source": signup.source,
+            "campaign": signup.campaign
+        }, event_id=event_id, created_at=now)
+        
+        return subscriber_id
     
-    def log_event(self, conn, subscriber_id: str, event_type: str, event_data: Dict = None):
+    def log_event(self, conn, subscriber_id: str, event_type: str, event_data: Dict = None,
+                  event_id: str = None, created_at: str = None):
         """Log an event for analytics."""
-        conn.execute("""
-            INSERT INTO events (id, subscriber_id, event_type, event_data, created_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            str(uuid.uuid4()),
+        conn.execute(_INSERT_EVENT_SQL, (
+            event_id or new_ids(1)[0],
             subscriber_id,
             event_type,
-            json.dumps(event_data or {}),
-            datetime.now(timezone.utc).isoformat()
+            orjson.dumps(event_data or {}).decode(),
+            created_at or datetime.now(timezone.utc).isoformat()
         ))
     
-    def get_analytics(self, days: int = 30) -> Dict[str, Any]:
-        """Get comprehensive analytics."""
+    def _invalidate_analytics_cache(self):
+        """Mark every cached analytics result as outdated."""
+        with self._analytics_cache_lock:
+            self._analytics_cache_version += 1
+    
+    def get_analytics(
+        self,
+        days: int = 30,
+        max_age: float = ANALYTICS_CACHE_TTL,
+        allow_stale: bool = False
+    ) -> Dict[str, Any]:
+        """Get comprehensive analytics.
+        
+        Results are cached per ``days`` for ``max_age`` seconds and dropped as
+        soon as a subscriber is added, unless ``allow_stale`` is set, in which
+        case only the age is checked.
+        """
+        with self._analytics_cache_lock:
+            cached = self._analytics_cache.get(days)
+            version = self._analytics_cache_version
+        
+        if cached:
+            cached_ts, cached_version, analytics = cached
+            if (time.monotonic() - cached_ts < max_age
+                    and (allow_stale or cached_version == version)):
+                return {**analytics, "launch_countdown": self._launch_countdown()}
+        
+        analytics = self._query_analytics(days)
+        with self._analytics_cache_lock:
+            self._analytics_cache[days] = (time.monotonic(), version, analytics)
+        
+        return {**analytics, "launch_countdown": self._launch_countdown()}
+    
+    def _query_analytics(self, days: int) -> Dict[str, Any]:
+        """Run the analytics queries against a read-only connection."""
         cutoff_date = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
         
-        with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            
-            # Total counts
-            total = conn.execute("SELECT COUNT(*) FROM subscribers").fetchone()[0]
-            active = conn.execute("SELECT COUNT(*) FROM subscribers WHERE is_active = 1").fetchone()[0]
-            confirmed = conn.execute("SELECT COUNT(*) FROM subscribers WHERE is_confirmed = 1").fetchone()[0]
-            
-            # Daily signups
-            daily_signups = conn.execute("""
-                SELECT DATE(created_at) as date, COUNT(*) as count
-                FROM subscribers 
-                WHERE created_at >= ?
-                GROUP BY DATE(created_at)
-                ORDER BY date DESC
-            """, (cutoff_date,)).fetchall()
-            
-            # Sources
-            sources = conn.execute("""
-                SELECT source, COUNT(*) as count
-                FROM subscribers 
-                WHERE created_at >= ?
-                GROUP BY source
-                ORDER BY count DESC
-            """, (cutoff_date,)).fetchall()
+        with self.get_read_conn() as conn:
+            # Total counts in a single pass over the table
+            total, active, confirmed = conn.execute(_COUNT_QUERIES_SQL).fetchone()
             
-            # Campaigns
-            campaigns = conn.execute("""
-                SELECT campaign, COUNT(*) as count
-                FROM subscribers 
-                WHERE created_at >= ?
-                GROUP BY campaign
-                ORDER BY count DESC
-            """, (cutoff_date,)).fetchall()
+            # Daily counts come from the rollup table, one row per day
+            daily_signups = conn.execute(_DAILY_SIGNUPS_SQL, (cutoff_date[:10],)).fetchall()
             
-            # Launch countdown - use timezone-aware datetime
-            launch_date = datetime.fromisoformat("2025-09-01T00:00:00+00:00")
-            now = datetime.now(timezone.utc)
-            time_diff = launch_date - now
-            
-            return {
-                "total_subscribers": total,
-                "active_subscribers": active,
-                "confirmed_subscribers": confirmed,
-                "daily_signups": [dict(row) for row in daily_signups],
-                "sources": [dict(row) for row in sources],
-                "campaigns": [dict(row) for row in campaigns],
-                "launch_countdown": {
-                    "days": max(0, time_diff.days),
-                    "hours": max(0, time_diff.seconds // 3600),
-                    "minutes": max(0, (time_diff.seconds % 3600) // 60),
-                    "seconds": max(0, time_diff.seconds % 60),
-                    "total_seconds": max(0, int(time_diff.total_seconds()))
-                }
-            }
+            # Source and campaign breakdowns share one scan
+            grouped = conn.execute(_BREAKDOWNS_SQL, (cutoff_date,)).fetchall()
+        
+        breakdowns: Dict[str, List[Dict[str, Any]]] = {"source": [], "campaign": []}
+        for kind, key, count in grouped:
+            breakdowns[kind].append({kind: key, "count": count})
+        
+        breakdowns["source"].sort(key=lambda row: row["count"], reverse=True)
+        breakdowns["campaign"].sort(key=lambda row: row["count"], reverse=True)
+        
+        return {
+            "total_subscribers": total,
+            "active_subscribers": active,
+            "confirmed_subscribers": confirmed,
+            "daily_signups": [dict(row) for row in daily_signups],
+            "sources": breakdowns["source"],
+            "campaigns": breakdowns["campaign"]
+        }
+    
+    @staticmethod
+    def _launch_countdown() -> Dict[str, int]:
+        """Time remaining until launch, recomputed at most once per second.
+        
+        Returns a fresh dict, since the result ends up in responses.
+        """
+        return dict(launch_countdown(int(time.time())))
     
     def export_subscribers(self, campaign: str = None) -> List[Dict]:
         """Export subscribers for a campaign."""
-        with self.get_connection() as conn:
-            conn.row_factory = sqlite3.Row
-            
-            query = "SELECT * FROM subscribers WHERE is_active = 1"
-            params = []
-            
-            if campaign:
-                query += " AND campaign = ?"
-                params.append(campaign)
-            
-            query += " ORDER BY created_at DESC"
-            
-            return [dict(row) for row in conn.execute(query, params).fetchall()]
+        with self.get_read_conn() as conn:
+            return [
+                dict(row)
+                for rows in self._fetch_subscriber_batches(conn, campaign)
+                for row in rows
+            ]
+    
+    def iter_subscribers(self, campaign: str = None) -> Iterator[sqlite3.Row]:
+        """Yield subscribers for a campaign without loading them all at once."""
+        for rows in self.iter_subscriber_batches(campaign):
+            yield from rows
+    
+    def iter_subscriber_batches(self, campaign: str = None) -> Iterator[List[sqlite3.Row]]:
+        """Yield subscribers for a campaign in batches of EXPORT_FETCH_SIZE rows.
+        
+        A streamed export lives as long as the client's download, so it runs
+        on its own read-only connection instead of tying up the shared pool.
+        At most EXPORT_STREAM_LIMIT streams run at once; further ones wait up
+        to READ_POOL_TIMEOUT seconds for a slot. The read transaction still
+        spans the whole download and holds back WAL checkpoints until then.
+        """
+        if not self._export_slots.acquire(timeout=READ_POOL_TIMEOUT):
+            raise sqlite3.OperationalError("Timed out waiting for an export slot")
+        try:
+            conn = self._connect(read_only=True, track=False)
+            try:
+                yield from self._fetch_subscriber_batches(conn, campaign)
+            finally:
+                conn.close()
+        finally:
+            self._export_slots.release()
+    
+    @staticmethod
+    def _fetch_subscriber_batches(conn: sqlite3.Connection,
+                                  campaign: str = None) -> Iterator[List[sqlite3.Row]]:
+        """Run the export query on ``conn`` and yield its rows in batches."""
+        if campaign:
+            query, params = _EXPORT_CAMPAIGN_SQL, (campaign,)
+        else:
+            query, params = _EXPORT_SQL, ()
+        
+        cursor = conn.execute(query, params)
+        cursor.arraysize = EXPORT_FETCH_SIZE
+        while rows := cursor.fetchmany():
+            yield rows
+
+
+def iter_csv(batches: Iterable[List[sqlite3.Row]]) -> Iterator[str]:
+    """Render batches of rows as CSV text, one chunk per batch, header first.
+    
+    writerows() runs the per-row loop inside the C csv module.
+    """
+    output = io.StringIO()
+    writer = csv.writer(output)
+    header_written = False
+    
+    for rows in batches:
+        if not header_written:
+            writer.writerow(rows[0].keys())
+            header_written = True
+        writer.writerows(rows)
+        yield output.getvalue()
+        output.seek(0)
+        output.truncate()
+
+
+# Outgoing email
+SMTP_WORKERS = 2  # Persistent SMTP connections
+SMTP_OUTBOX_SIZE = 1000
+SMTP_IDLE_TIMEOUT = 60.0  # seconds before an idle connection is closed
+
+# Email templates, compiled once at import
+WELCOME_SUBJECT = "🎉 Welcome to MuseQuill.ink Early Access!"
+WELCOME_TEMPLATE = string.Template("""\
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+        .container { max-width: 600px; margin: 0 auto; padding: 20px; }
+        .header { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }
+        .content { background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }
+        .benefits { background: white; padding: 20px; border-radius: 10px; margin: 20px 0; }
+        .cta { text-align: center; margin: 30px 0; }
+        .button { display: inline-block; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 25px; font-weight: bold; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>🖋️ Welcome to MuseQuill.ink!</h1>
+            <p>Where Digital Quills Meet Virtual Ink</p>
+        </div>
+        <div class="content">
+            <h2>Hi $name! 👋</h2>
+
+            <p>Thank you for joining our exclusive early access list for <strong>MuseQuill.ink</strong> - the revolutionary AI-powered book writing system that's launching September 1, 2025!</p>
+
+            <div class="benefits">
+                <h3>🚀 What's Coming:</h3>
+                <ul>
+                    <li>🤖 <strong>Multi-Agent AI Collaboration</strong> - 9 specialized agents working together</li>
+                    <li>🧠 <strong>Advanced Memory System</strong> - Perfect story consistency</li>
+                    <li>🔍 <strong>Real-Time Research</strong> - Authentic details and fact-checking</li>
+                    <li>⚔️ <strong>Quality Control</strong> - Publication-ready content</li>
+                </ul>
+            </div>
+
+            <div class="benefits">
+                <h3>🎁 Your Early Access Benefits:</h3>
+                <ul>
+                    <li>✅ <strong>50% off lifetime access</strong></li>
+                    <li>✅ Priority support and training</li>
+                    <li>✅ Exclusive beta features</li>
+                    <li>✅ Direct input on product development</li>
+                    <li>✅ VIP access to our AI team</li>
+                </ul>
+            </div>
+
+            <p>We'll keep you updated with exclusive previews, development insights, and launch details. You're now part of an exclusive group that will shape the future of AI-assisted writing!</p>
+
+            <div class="cta">
+                <a href="https://musequill.ink" class="button">Visit MuseQuill.ink</a>
+            </div>
+
+            <p><small>Questions? Reply to this email - we read every message!</small></p>
+
+            <p>Best regards,<br>
+            <strong>The MuseQuill.ink Team</strong></p>
+
+            <hr>
+            <p><small>You're receiving this because you signed up for early access at musequill.ink. 
+            <a href="https://newsletter.musequill.ink/unsubscribe?token=$token">Unsubscribe</a></small></p>
+        </div>
+    </div>
+</body>
+</html>
+""")
 
 
 # Email Manager
 class EmailManager:
-    """Handle email sending functionality."""
+    """Handle email sending functionality.
+    
+    Messages are queued and sent by SMTP_WORKERS background workers. Each
+    worker keeps one authenticated connection open and sends every queued
+    message over it, so the TCP/TLS handshake and login happen once per
+    connection instead of once per email. Idle connections are closed after
+    SMTP_IDLE_TIMEOUT seconds and reopened on demand.
+    """
     
     def __init__(self, config: NewsletterConfig):
         self.config = config
+        self._outbox: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+    
+    @property
+    def smtp_configured(self) -> bool:
+        return bool(self.config.smtp_username and self.config.smtp_password)
+    
+    async def start(self):
+        """Start the sender workers (no-op when SMTP is not configured)."""
+        if not self.smtp_configured:
+            return
+        self._outbox = asyncio.Queue(maxsize=SMTP_OUTBOX_SIZE)
+        self._workers = [asyncio.create_task(self._sender()) for _ in range(SMTP_WORKERS)]
+    
+    async def stop(self):
+        """Stop the sender workers and close their connections."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._outbox = None
+    
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.config.smtp_server,
+            port=self.config.smtp_port,
+            start_tls=True
+        )
+        await client.connect()
+        await client.login(self.config.smtp_username, self.config.smtp_password)
+        return client
+    
+    @staticmethod
+    async def _disconnect(client: Optional[aiosmtplib.SMTP]):
+        if client is None or not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except Exception:
+            client.close()
+    
+    async def _sender(self):
+        """Send queued messages over a persistent connection."""
+        client = None
+        try:
+            while True:
+                try:
+                    msg = await asyncio.wait_for(
+                        self._outbox.get(),
+                        SMTP_IDLE_TIMEOUT if client else None
+                    )
+                except asyncio.TimeoutError:
+                    await self._disconnect(client)
+                    client = None
+                    continue
+                
+                # A pooled connection may have been dropped by the server,
+                # so a failure is retried once on a fresh connection.
+                for attempt in range(2):
+                    try:
+                        if client is None:
+                            client = await self._connect()
+                        await client.send_message(msg)
+                        logging.info(f"Welcome email sent to {msg['To']}")
+                        break
+                    except Exception as e:
+                        await self._disconnect(client)
+                        client = None
+                        if attempt:
+                            logging.error(f"Failed to send welcome email to {msg['To']}: {e}")
+        finally:
+            await self._disconnect(client)
     
     async def send_welcome_email(self, email: str, name: str = None, confirmation_token: str = None):
-        """Send welcome email to new subscriber."""
-        if not self.config.smtp_username or not self.config.smtp_password:
+        """Queue a welcome email for a new subscriber."""
+        if not self.smtp_configured:
             logging.warning("SMTP not configured, skipping welcome email")
             return
         
-        subject = "🎉 Welcome to MuseQuill.ink Early Access!"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                .header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0; }}
-                .content {{ background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; }}
-                .benefits {{ background: white; padding: 20px; border-radius: 10px; margin: 20px 0; }}
-                .cta {{ text-align: center; margin: 30px 0; }}
-                .button {{ display: inline-block; background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); color: white; padding: 15px 30px; text-decoration: none; border-radius: 25px; font-weight: bold; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🖋️ Welcome to MuseQuill.ink!</h1>
-                    <p>Where Digital Quills Meet Virtual Ink</p>
-                </div>
-                <div class="content">
-                    <h2>Hi {name or 'there'}! 👋</h2>
-                    
-                    <p>Thank you for joining our exclusive early access list for <strong>MuseQuill.ink</strong> - the revolutionary AI-powered book writing system that's launching September 1, 2025!</p>
-                    
-                    <div class="benefits">
-                        <h3>🚀 What's Coming:</h3>
-                        <ul>
-                            <li>🤖 <strong>Multi-Agent AI Collaboration</strong> - 9 specialized agents working together</li>
-                            <li>🧠 <strong>Advanced Memory System</strong> - Perfect story consistency</li>
-                            <li>🔍 <strong>Real-Time Research</strong> - Authentic details and fact-checking</li>
-                            <li>⚔️ <strong>Quality Control</strong> - Publication-ready content</li>
-                        </ul>
-                    </div>
-                    
-                    <div class="benefits">
-                        <h3>🎁 Your Early Access Benefits:</h3>
-                        <ul>
-                            <li>✅ <strong>50% off lifetime access</strong></li>
-                            <li>✅ Priority support and training</li>
-                            <li>✅ Exclusive beta features</li>
-                            <li>✅ Direct input on product development</li>
-                            <li>✅ VIP access to our AI team</li>
-                        </ul>
-                    </div>
-                    
-                    <p>We'll keep you updated with exclusive previews, development insights, and launch details. You're now part of an exclusive group that will shape the future of AI-assisted writing!</p>
-                    
-                    <div class="cta">
-                        <a href="https://musequill.ink" class="button">Visit MuseQuill.ink</a>
-                    </div>
-                    
-                    <p><small>Questions? Reply to this email - we read every message!</small></p>
-                    
-                    <p>Best regards,<br>
-                    <strong>The MuseQuill.ink Team</strong></p>
-                    
-                    <hr>
-                    <p><small>You're receiving this because you signed up for early access at musequill.ink. 
-                    <a href="https://newsletter.musequill.ink/unsubscribe?token={confirmation_token}">Unsubscribe</a></small></p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        if self._outbox is None:
+            logging.error(f"Email workers not running, skipping welcome email to {email}")
+            return
+        
+        html_content = WELCOME_TEMPLATE.substitute(
+            name=name or 'there',
+            token=confirmation_token
+        )
         
         try:
             msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
+            msg['Subject'] = WELCOME_SUBJECT
             msg['From'] = f"{self.config.from_name} <{self.config.from_email}>"
             msg['To'] = email
             
             html_part = MIMEText(html_content, 'html')
             msg.attach(html_part)
             
-            with smtplib.SMTP(self.config.smtp_server, self.config.smtp_port) as server:
-                server.starttls()
-                server.login(self.config.smtp_username, self.config.smtp_password)
-                server.send_message(msg)
-            
-            logging.info(f"Welcome email sent to {email}")
+            self._outbox.put_nowait(msg)
             
         except Exception as e:
-            logging.error(f"Failed to send welcome email to {email}: {e}")
+            logging.error(f"Failed to queue welcome email to {email}: {e}")
+
+
+# Admin dashboard page; only the placeholders are filled per request
+ADMIN_TEMPLATE = string.Template("""\
+<!DOCTYPE html>
+<html>
+<head>
+    <title>MuseQuill Newsletter Admin</title>
+    <style>
+        body { font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        .card { background: white; padding: 20px; margin: 20px 0; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        .stats { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; }
+        .stat { text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 10px; }
+        .stat h3 { margin: 0; font-size: 2em; }
+        .stat p { margin: 5px 0 0 0; opacity: 0.9; }
+        table { width: 100%; border-collapse: collapse; }
+        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background: #f8f9fa; }
+        .countdown { text-align: center; font-size: 1.2em; color: #667eea; font-weight: bold; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1>🖋️ MuseQuill Newsletter Admin</h1>
+
+        <div class="card">
+            <div class="countdown">
+                🚀 Launch Countdown: $days days, 
+                $hours hours, 
+                $minutes minutes remaining!
+            </div>
+        </div>
+
+        <div class="stats">
+            <div class="stat">
+                <h3>$total</h3>
+                <p>Total Subscribers</p>
+            </div>
+            <div class="stat">
+                <h3>$active</h3>
+                <p>Active Subscribers</p>
+            </div>
+            <div class="stat">
+                <h3>$confirmed</h3>
+                <p>Confirmed Subscribers</p>
+            </div>
+            <div class="stat">
+                <h3>$days_tracked</h3>
+                <p>Days Tracked</p>
+            </div>
+        </div>
+
+        <div class="card">
+            <h2>📊 Signup Sources</h2>
+            <table>
+                <tr><th>Source</th><th>Subscribers</th></tr>
+                $source_rows
+            </table>
+        </div>
+
+        <div class="card">
+            <h2>📈 Recent Daily Signups</h2>
+            <table>
+                <tr><th>Date</th><th>Signups</th></tr>
+                $daily_rows
+            </table>
+        </div>
+
+        <div class="card">
+            <h2>⚡ Quick Actions</h2>
+            <p>
+                <a href="/export?format=csv&token=$token" target="_blank">📥 Export CSV</a> | 
+                <a href="/export?format=json&token=$token" target="_blank">📥 Export JSON</a> | 
+                <a href="/analytics?token=$token" target="_blank">📊 Raw Analytics</a>
+            </p>
+        </div>
+    </div>
+
+    <script>
+        // Auto-refresh every 5 minutes
+        setTimeout(() => location.reload(), 300000);
+    </script>
+</body>
+</html>
+""")
+
+
+# Background batching shared by the /track flusher and the signup writer
+async def _collect_batch(items: asyncio.Queue, batch: list, size: int, window: float):
+    """Wait for one item, then keep adding to ``batch`` until it holds
+    ``size`` items or ``window`` seconds have passed since the first.
+    
+    Items are appended in place so a caller that is cancelled mid-collection
+    still holds everything already taken off the queue.
+    """
+    loop = asyncio.get_running_loop()
+    batch.append(await items.get())
+    deadline = loop.time() + window
+    while len(batch) < size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(items.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+
+
+def _drain(items: asyncio.Queue) -> list:
+    """Take everything currently queued without waiting."""
+    drained = []
+    while not items.empty():
+        drained.append(items.get_nowait())
+    return drained
+
+
+# Analytics event log
+TRACK_LOG_PATH = "analytics.log"
+TRACK_QUEUE_SIZE = 10000
+TRACK_BATCH_SIZE = 100
+TRACK_FLUSH_INTERVAL = 0.5  # seconds
+
+
+def append_track_lines(lines: List[bytes]):
+    """Append a batch of encoded event lines to the analytics log."""
+    with open(TRACK_LOG_PATH, "ab") as f:
+        f.write(b"".join(lines))
+
+
+async def flush_track_events(track_queue: asyncio.Queue):
+    """Drain tracked events to disk in batches.
+    
+    A batch is written once it holds TRACK_BATCH_SIZE events or
+    TRACK_FLUSH_INTERVAL seconds after its first event, whichever is first.
+    Pending events are written synchronously when the task is cancelled.
+    """
+    batch: List[bytes] = []
+    try:
+        while True:
+            await _collect_batch(track_queue, batch, TRACK_BATCH_SIZE, TRACK_FLUSH_INTERVAL)
+            
+            # Hand the batch off first: if cancellation lands mid-write, the
+            # thread still finishes it and the drain below must not repeat it.
+            lines, batch = batch, []
+            try:
+                await asyncio.to_thread(append_track_lines, lines)
+            except Exception as e:
+                logging.error(f"Failed to write {len(lines)} tracked events: {e}")
+    
+    except asyncio.CancelledError:
+        batch += _drain(track_queue)
+        if batch:
+            append_track_lines(batch)
+        raise
+
+
+# Signup writes
+SIGNUP_QUEUE_SIZE = 10000
+SIGNUP_BATCH_SIZE = 100
+SIGNUP_BATCH_WINDOW = 0.02  # seconds
+
+
+async def write_signups(db: NewsletterDatabase, signup_queue: asyncio.Queue):
+    """Write queued signups from a single task, batched into transactions.
+    
+    Queue items are ``(signup, ip_address, future)``. A batch closes once it
+    holds SIGNUP_BATCH_SIZE signups or SIGNUP_BATCH_WINDOW seconds after its
+    first one, and is written off the event loop in one transaction. Each
+    future receives its subscriber id (None if already subscribed), or the
+    exception that failed the batch. On cancellation an in-flight batch is
+    allowed to finish and is answered; signups still queued are cancelled.
+    """
+    batch: List[Tuple[NewsletterSignup, Optional[str], asyncio.Future]] = []
+    try:
+        while True:
+            await _collect_batch(signup_queue, batch, SIGNUP_BATCH_SIZE, SIGNUP_BATCH_WINDOW)
+            
+            pending, batch = batch, []
+            write = asyncio.ensure_future(asyncio.to_thread(
+                db.add_subscribers, [(signup, ip_address) for signup, ip_address, _ in pending]
+            ))
+            try:
+                await asyncio.shield(write)
+            except asyncio.CancelledError:
+                # The thread commits the batch regardless, so let it finish
+                # and answer these signups before shutting down.
+                await asyncio.wait([write])
+                raise
+            except Exception:
+                pass  # Reported to each signup below
+            finally:
+                _resolve_signups(pending, write)
+    
+    except asyncio.CancelledError:
+        for _, _, future in batch + _drain(signup_queue):
+            future.cancel()
+        raise
+
+
+def _resolve_signups(pending: list, write: asyncio.Future):
+    """Pass a finished batch write's outcome to each waiting signup."""
+    if not write.done() or write.cancelled():
+        # Cancelled again while waiting out the write; the outcome is unknown
+        for _, _, future in pending:
+            future.cancel()
+        return
+    
+    if write.exception() is not None:
+        logging.error(f"Failed to write {len(pending)} signups: {write.exception()}")
+        for _, _, future in pending:
+            if not future.done():
+                future.set_exception(write.exception())
+        return
+    
+    for (_, _, future), subscriber_id in zip(pending, write.result()):
+        if not future.done():
+            future.set_result(subscriber_id)
+
+
+@lru_cache(maxsize=32)
+def render_admin_dashboard(
+    countdown: Tuple[int, int, int],
+    total: int,
+    active: int,
+    confirmed: int,
+    days_tracked: int,
+    sources: Tuple[Tuple[str, int], ...],
+    daily_signups: Tuple[Tuple[str, int], ...],
+    token: str
+) -> str:
+    """Render the admin dashboard.
+    
+    Every displayed value is an argument, so repeated hits with unchanged
+    numbers (the countdown only shows minutes) reuse the rendered page.
+    """
+    days, hours, minutes = countdown
+    return ADMIN_TEMPLATE.substitute(
+        days=days,
+        hours=hours,
+        minutes=minutes,
+        total=total,
+        active=active,
+        confirmed=confirmed,
+        days_tracked=days_tracked,
+        source_rows=''.join(
+            f"<tr><td>{source}</td><td>{count}</td></tr>" for source, count in sources
+        ),
+        daily_rows=''.join(
+            f"<tr><td>{date}</td><td>{count}</td></tr>" for date, count in daily_signups
+        ),
+        token=token
+    )
 
 
 # FastAPI Application
 def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
     """Create the newsletter FastAPI application."""
     
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        """Start and stop background workers."""
+        app.state.track_queue = asyncio.Queue(maxsize=TRACK_QUEUE_SIZE)
+        track_flusher = asyncio.create_task(flush_track_events(app.state.track_queue))
+        app.state.signup_queue = asyncio.Queue(maxsize=SIGNUP_QUEUE_SIZE)
+        signup_writer = asyncio.create_task(write_signups(db, app.state.signup_queue))
+        await email_manager.start()
+        try:
+            yield
+        finally:
+            signup_writer.cancel()
+            track_flusher.cancel()
+            await asyncio.gather(signup_writer, track_flusher, return_exceptions=True)
+            # Let handlers woken by the writer's last batch queue their
+            # welcome emails before the outbox is shut down
+            await asyncio.sleep(0)
+            await email_manager.stop()
+    
     app = FastAPI(
         title="MuseQuill Newsletter Service",
         description="Independent newsletter and analytics service for MuseQuill.ink",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan
     )
     
     # CORS
@@ -497,28 +1205,49 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
         """Get client IP address."""
         forwarded = request.headers.get("X-Forwarded-For")
         if forwarded:
-            return forwarded.split(",")[0]
-        return request.client.host if request.client else "unknown"
+            # First hop is the original client; partition avoids building a list
+            return forwarded.partition(",")[0].strip()
+        client = request.client
+        return client.host if client else "unknown"
+    
+    # Encoded once; compare_digest takes constant time regardless of input
+    admin_token_bytes = config.admin_token.encode()
     
     def verify_admin(token: str = Query(...)) -> bool:
         """Verify admin token."""
-        if token != config.admin_token:
+        if not hmac.compare_digest(token.encode(), admin_token_bytes):
             raise HTTPException(status_code=403, detail="Invalid admin token")
         return True
     
+    async def parse_signup(request: Request) -> NewsletterSignup:
+        """Parse the signup body straight from bytes with Pydantic's JSON parser."""
+        try:
+            return NewsletterSignup.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise RequestValidationError([
+                {**error, "loc": ("body", *error["loc"])}
+                for error in e.errors(include_url=False)
+            ])
+    
     # Shared signup processing function
     async def process_signup(signup: NewsletterSignup, request: Request):
         """Process signup request (shared logic)."""
         try:
             ip_address = get_client_ip(request)
-            subscriber_id = db.add_subscriber(signup, ip_address)
             
-            # Send welcome email asynchronously
-            asyncio.create_task(email_manager.send_welcome_email(
+            # Hand the write to the single signup writer and wait for its batch
+            future = asyncio.get_running_loop().create_future()
+            await request.app.state.signup_queue.put((signup, ip_address, future))
+            subscriber_id = await future
+            if subscriber_id is None:
+                raise ValueError("Email already subscribed")
+            
+            # Queue welcome email; background workers send it
+            await email_manager.send_welcome_email(
                 signup.email, 
                 signup.name,
                 subscriber_id  # Using subscriber_id as confirmation token for simplicity
-            ))
+            )
             
             logging.info(f"New subscriber: {signup.email} from {signup.source}")
             
@@ -541,18 +1270,18 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
             raise HTTPException(status_code=500, detail="Signup failed. Please try again.")
     
     # Routes - Multiple endpoints for ad-blocker compatibility
-    @app.post("/signup", response_model=NewsletterResponse)
-    async def newsletter_signup(signup: NewsletterSignup, request: Request):
+    @app.post("/signup", response_model=NewsletterResponse, openapi_extra=SIGNUP_OPENAPI)
+    async def newsletter_signup(request: Request, signup: NewsletterSignup = Depends(parse_signup)):
         """Handle newsletter signup."""
         return await process_signup(signup, request)
     
-    @app.post("/register", response_model=NewsletterResponse) 
-    async def newsletter_register(signup: NewsletterSignup, request: Request):
+    @app.post("/register", response_model=NewsletterResponse, openapi_extra=SIGNUP_OPENAPI)
+    async def newsletter_register(request: Request, signup: NewsletterSignup = Depends(parse_signup)):
         """Handle newsletter registration (ad-blocker friendly endpoint)."""
         return await process_signup(signup, request)
     
-    @app.post("/contact", response_model=NewsletterResponse)
-    async def newsletter_contact(signup: NewsletterSignup, request: Request):
+    @app.post("/contact", response_model=NewsletterResponse, openapi_extra=SIGNUP_OPENAPI)
+    async def newsletter_contact(request: Request, signup: NewsletterSignup = Depends(parse_signup)):
         """Handle newsletter contact form (ad-blocker friendly endpoint)."""
         return await process_signup(signup, request)
     
@@ -562,27 +1291,36 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
         admin: bool = Depends(verify_admin)
     ):
         """Get newsletter analytics (admin only)."""
-        analytics = db.get_analytics(days)
+        analytics = await asyncio.to_thread(db.get_analytics, days)
         return AnalyticsResponse(**analytics)
     
     @app.get("/export")
     async def export_subscribers(
         campaign: Optional[str] = Query(default=None),
         format: str = Query(default="json", pattern="^(json|csv)$"),  # Fixed: using pattern instead of regex
+        wrap: Optional[str] = Query(default=None, pattern="^json$"),
         admin: bool = Depends(verify_admin)
     ):
-        """Export subscribers (admin only)."""
-        subscribers = db.export_subscribers(campaign)
+        """Export subscribers (admin only).
+        
+        CSV is streamed as ``text/csv`` unless ``wrap=json`` asks for the
+        legacy ``{"csv_data": ..., "count": ...}`` response.
+        """
+        if format == "csv" and wrap != "json":
+            return StreamingResponse(
+                iter_csv(db.iter_subscriber_batches(campaign)),
+                media_type="text/csv",
+                headers={"Content-Disposition": 'attachment; filename="subscribers.csv"'}
+            )
+        
+        subscribers = await asyncio.to_thread(db.export_subscribers, campaign)
         
         if format == "csv":
-            import csv
-            import io
-            
             output = io.StringIO()
             if subscribers:
-                writer = csv.DictWriter(output, fieldnames=subscribers[0].keys())
-                writer.writeheader()
-                writer.writerows(subscribers)
+                writer = csv.writer(output)
+                writer.writerow(subscribers[0].keys())
+                writer.writerows(row.values() for row in subscribers)
             
             return JSONResponse(
                 content={"csv_data": output.getvalue(), "count": len(subscribers)},
@@ -594,7 +1332,9 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
     @app.get("/stats")
     async def public_stats():
         """Public statistics (limited data)."""
-        analytics = db.get_analytics(30)
+        analytics = await asyncio.to_thread(
+            db.get_analytics, 30, STATS_CACHE_TTL, True
+        )
         return {
             "total_subscribers": analytics["total_subscribers"],
             "launch_countdown": analytics["launch_countdown"],
@@ -604,14 +1344,21 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
     @app.post("/track")
     async def track_event(event_data: AnalyticsEvent):
         try:
-            # Log to file
-            with open("analytics.log", "a") as f:
-                f.write(f"{datetime.now().isoformat()}: {event_data.json()}\n")
-            
-            return {"success": True, "message": "Event tracked"}
-        
+            line = (
+                f"{datetime.now().isoformat()}: ".encode()
+                + orjson.dumps(event_data.model_dump())
+                + b"\n"
+            )
         except Exception as e:
             return {"success": False, "error": str(e)}
+        
+        # Written to the log by the background flusher
+        try:
+            app.state.track_queue.put_nowait(line)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=429, detail="Too many events, please retry later")
+        
+        return {"success": True, "message": "Event tracked"}
 
     @app.get("/health")
     async def health_check():
@@ -626,98 +1373,41 @@ def create_newsletter_app(config: NewsletterConfig) -> FastAPI:
     @app.get("/admin", response_class=HTMLResponse)
     async def admin_dashboard(admin: bool = Depends(verify_admin)):
         """Simple admin dashboard."""
-        analytics = db.get_analytics(30)
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>MuseQuill Newsletter Admin</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }}
-                .container {{ max-width: 1200px; margin: 0 auto; }}
-                .card {{ background: white; padding: 20px; margin: 20px 0; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }}
-                .stats {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; }}
-                .stat {{ text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border-radius: 10px; }}
-                .stat h3 {{ margin: 0; font-size: 2em; }}
-                .stat p {{ margin: 5px 0 0 0; opacity: 0.9; }}
-                table {{ width: 100%; border-collapse: collapse; }}
-                th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-                th {{ background: #f8f9fa; }}
-                .countdown {{ text-align: center; font-size: 1.2em; color: #667eea; font-weight: bold; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <h1>🖋️ MuseQuill Newsletter Admin</h1>
-                
-                <div class="card">
-                    <div class="countdown">
-                        🚀 Launch Countdown: {analytics['launch_countdown']['days']} days, 
-                        {analytics['launch_countdown']['hours']} hours, 
-                        {analytics['launch_countdown']['minutes']} minutes remaining!
-                    </div>
-                </div>
-                
-                <div class="stats">
-                    <div class="stat">
-                        <h3>{analytics['total_subscribers']}</h3>
-                        <p>Total Subscribers</p>
-                    </div>
-                    <div class="stat">
-                        <h3>{analytics['active_subscribers']}</h3>
-                        <p>Active Subscribers</p>
-                    </div>
-                    <div class="stat">
-                        <h3>{analytics['confirmed_subscribers']}</h3>
-                        <p>Confirmed Subscribers</p>
-                    </div>
-                    <div class="stat">
-                        <h3>{len(analytics['daily_signups'])}</h3>
-                        <p>Days Tracked</p>
-                    </div>
-                </div>
-                
-                <div class="card">
-                    <h2>📊 Signup Sources</h2>
-                    <table>
-                        <tr><th>Source</th><th>Subscribers</th></tr>
-                        {''.join(f"<tr><td>{s['source']}</td><td>{s['count']}</td></tr>" for s in analytics['sources'])}
-                    </table>
-                </div>
-                
-                <div class="card">
-                    <h2>📈 Recent Daily Signups</h2>
-                    <table>
-                        <tr><th>Date</th><th>Signups</th></tr>
-                        {''.join(f"<tr><td>{s['date']}</td><td>{s['count']}</td></tr>" for s in analytics['daily_signups'][:10])}
-                    </table>
-                </div>
-                
-                <div class="card">
-                    <h2>⚡ Quick Actions</h2>
-                    <p>
-                        <a href="/export?format=csv&token={config.admin_token}" target="_blank">📥 Export CSV</a> | 
-                        <a href="/export?format=json&token={config.admin_token}" target="_blank">📥 Export JSON</a> | 
-                        <a href="/analytics?token={config.admin_token}" target="_blank">📊 Raw Analytics</a>
-                    </p>
-                </div>
-            </div>
-            
-            <script>
-                // Auto-refresh every 5 minutes
-                setTimeout(() => location.reload(), 300000);
-            </script>
-        </body>
-        </html>
-        """
+        analytics = await asyncio.to_thread(db.get_analytics, 30)
+        
+        countdown = analytics['launch_countdown']
         
-        return html
+        return render_admin_dashboard(
+            (countdown['days'], countdown['hours'], countdown['minutes']),
+            analytics['total_subscribers'],
+            analytics['active_subscribers'],
+            analytics['confirmed_subscribers'],
+            len(analytics['daily_signups']),
+            tuple((s['source'], s['count']) for s in analytics['sources']),
+            tuple((s['date'], s['count']) for s in analytics['daily_signups'][:10]),
+            config.admin_token
+        )
     
     return app
 
 
 # Main application
+# Startup banner; filled in once with format_map
+BANNER = """
+🖋️ MuseQuill Newsletter Service Starting...
+
+📊 Admin Dashboard: http://localhost:{port}/admin?token={admin_token}
+📈 Public Stats: http://localhost:{port}/stats
+🏥 Health Check: http://localhost:{port}/health
+
+💾 Database: {database_path}
+📧 SMTP Configured: {smtp}
+🎯 Launch Date: September 1, 2025
+
+Ready to collect signups! 🚀
+"""
+
+
 def main():
     """Main entry point."""
     # Setup logging
@@ -733,25 +1423,23 @@ def main():
     app = create_newsletter_app(config)
     
     # Run server
-    print(f"""
-🖋️ MuseQuill Newsletter Service Starting...
-
-📊 Admin Dashboard: http://localhost:{config.port}/admin?token={config.admin_token}
-📈 Public Stats: http://localhost:{config.port}/stats
-🏥 Health Check: http://localhost:{config.port}/health
-
-💾 Database: {config.database_path}
-📧 SMTP Configured: {'Yes' if config.smtp_username else 'No'}
-🎯 Launch Date: September 1, 2025
-
-Ready to collect signups! 🚀
-    """)
+    print(BANNER.format_map({
+        "port": config.port,
+        "admin_token": config.admin_token,
+        "database_path": config.database_path,
+        "smtp": "Yes" if config.smtp_username else "No"
+    }), flush=True)
     
+    # loop/http "auto" pick uvloop and httptools when installed (they ship
+    # with uvicorn[standard]) and fall back to asyncio/h11 elsewhere.
     uvicorn.run(
         app,
         host=config.host,
         port=config.port,
-        log_level="debug"
+        log_level=os.getenv("LOG_LEVEL", "warning"),
+        loop="auto",
+        http="auto",
+        access_log=False
     )
 
 